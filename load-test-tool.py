@@ -6,9 +6,14 @@ Usage:
   - Edit the top-level `TOTAL_REQUESTS` variable to set the number of requests,
     or set the environment variable `STRESS_TOTAL_REQUESTS`.
   - You can also override using CLI flags: `--requests`, `--concurrency`, `--url`.
+  - Pass `--async` to drive requests from an asyncio event loop (aiohttp) instead
+    of worker threads, and `--processes N` to spread the load over N processes.
 
 Install requirements:
     pip install requests tqdm
+    pip install aiohttp  # optional, for --async
+    pip install uvloop   # optional, for --async --uvloop (Linux/macOS)
+    pip install 'httpx[http2]'  # optional, for --http2
 
 Example:
     python _stressTest.py --url https://example.com --requests 200 --concurrency 20
@@ -20,79 +25,561 @@ a short summary with success/failure counts and latency statistics.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import importlib.util
+import multiprocessing as mp
 import os
+import signal
 import sys
 import threading
 import time
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from queue import Empty
 from typing import Optional
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+
+try:
+    import aiohttp
+    import yarl  # installed with aiohttp
+except ImportError:  # optional: only needed for --async
+    aiohttp = None
+
+try:
+    import httpx
+except ImportError:  # optional: only needed for --http2
+    httpx = None
 
 # External (editable) defaults
 TOTAL_REQUESTS = int(os.environ.get("STRESS_TOTAL_REQUESTS", "100"))
 DEFAULT_CONCURRENCY = int(os.environ.get("STRESS_CONCURRENCY", "10"))
 DEFAULT_URL = os.environ.get("STRESS_TARGET_URL", "https://example.com")
 
+# Latency samples are stored unboxed as int64 nanoseconds; up to this many are preallocated
+# up front and longer runs grow the buffer on demand.
+LATENCY_PREALLOC_MAX = 1_000_000
+# Cap on kept latency samples (32 MiB). Past it the buffer becomes a ring that overwrites the
+# oldest samples, so unbounded paranoid runs keep a fixed memory footprint; worker processes
+# each send back their share of it, so the merged samples stay within the cap too.
+LATENCY_RING_SIZE = 1 << 22
+
+
+def make_request(session: requests.Session, prepared: requests.PreparedRequest, timeout: float = 10.0, settings: Optional[dict] = None):
+    """Send a prepared HTTP request using the provided Session.
+
+    `prepared` comes from `session.prepare_request` and `settings` from
+    `session.merge_environment_settings` (minus `stream`), both built once per worker,
+    so each call skips URL parsing, header merging and cookie-jar traversal.
+
+    The response is streamed and its raw, undecoded body read in 64 KiB chunks and
+    discarded, so the body is never decoded or joined into `resp.content`. Reading to
+    the end returns the connection to the pool for keep-alive.
+
+    Returns a tuple: (success: bool, status_code: Optional[int], elapsed_ns: int, error_message: Optional[str], http_version)
+    where `http_version` is whatever the client library reports (see `format_http_version`).
+    Elapsed time is integer nanoseconds; it is converted to seconds only when summarizing.
+    """
+    start = time.perf_counter_ns()
+    try:
+        resp = session.send(prepared, timeout=timeout, allow_redirects=False, stream=True, **(settings or {}))
+        raw = resp.raw
+        while raw.read(65536, decode_content=False):
+            pass
+        resp.close()
+        elapsed_ns = time.perf_counter_ns() - start
+        return True, resp.status_code, elapsed_ns, None, raw.version
+    except (RequestException, Urllib3HTTPError) as e:
+        elapsed_ns = time.perf_counter_ns() - start
+        return False, None, elapsed_ns, str(e), None
+
+
+async def make_request_async(session: "aiohttp.ClientSession", method: str, url: str, data: Optional[bytes] = None, headers: Optional[dict] = None):
+    """Send a single HTTP request using the provided aiohttp ClientSession.
+
+    The timeout is configured once on the session. The body is drained chunk by chunk
+    without being joined, so the connection can be reused. Returns the same tuple as
+    `make_request`.
+    """
+    start = time.perf_counter_ns()
+    try:
+        async with session.request(method, url, data=data, headers=headers, allow_redirects=False) as resp:
+            async for _ in resp.content.iter_any():
+                pass
+        elapsed_ns = time.perf_counter_ns() - start
+        return True, resp.status, elapsed_ns, None, resp.version
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        elapsed_ns = time.perf_counter_ns() - start
+        return False, None, elapsed_ns, str(e) or type(e).__name__, None
+
+
+async def make_request_httpx(client: "httpx.AsyncClient", method: str, url: str, data: Optional[bytes] = None):
+    """Send a single HTTP request using the provided httpx AsyncClient (used for HTTP/2).
+
+    The timeout is configured once on the client. The raw body is drained chunk by chunk
+    without being decoded or joined. Returns the same tuple as `make_request`.
+    """
+    start = time.perf_counter_ns()
+    try:
+        async with client.stream(method, url, content=data) as resp:
+            async for _ in resp.aiter_raw():
+                pass
+        elapsed_ns = time.perf_counter_ns() - start
+        return True, resp.status_code, elapsed_ns, None, resp.http_version
+    except httpx.HTTPError as e:
+        elapsed_ns = time.perf_counter_ns() - start
+        return False, None, elapsed_ns, str(e) or type(e).__name__, None
+
+
+class _Tally:
+    """Accumulates request results for one process; `record` is the per-result callback the engines call.
+
+    Only the thread that runs an engine calls `record`, so the counters are single-writer
+    and need no lock. Worker processes send their tally back to the parent to be merged.
+    """
+
+    def __init__(self, total_requests: int):
+        self.success = 0
+        self.failure = 0
+        self.http_version = None
+        self.latencies = array("q", [0]) * min(total_requests, LATENCY_PREALLOC_MAX)
+        # Response counts indexed by status code. HTTP status codes have three digits;
+        # `record` counts any other code (h2 does not validate `:status`) as a failure.
+        self.status_counts = array("Q", [0]) * 1000
+
+    def record(self, result):
+        success, status_code, elapsed_ns, error, version = result
+        if success and status_code is not None and not 0 <= status_code < 1000:
+            success = False
+        if success:
+            if self.http_version is None:
+                self.http_version = version
+            # successful requests index the latency buffer, wrapping around once it is full
+            n = self.success
+            if n < len(self.latencies):
+                self.latencies[n] = elapsed_ns
+            elif n < LATENCY_RING_SIZE:
+                self.latencies.append(elapsed_ns)
+            else:
+                self.latencies[n % LATENCY_RING_SIZE] = elapsed_ns
+            self.success += 1
+            if status_code is not None:
+                self.status_counts[status_code] += 1
+        else:
+            self.failure += 1
+
+    def compact(self, limit: int = LATENCY_RING_SIZE):
+        """Drop the unused tail of the preallocated latency buffer and keep at most the `limit` most recent samples."""
+        del self.latencies[self.success:]
+        kept = len(self.latencies)
+        if kept > limit:
+            if self.success > kept:
+                # unroll the wrapped ring so the most recent samples are at the end
+                head = self.success % kept
+                self.latencies = self.latencies[head:] + self.latencies[:head]
+            del self.latencies[:-limit]
+
+    def merge(self, other: "_Tally"):
+        self.compact()
+        other.compact()
+        self.success += other.success
+        self.failure += other.failure
+        self.latencies.extend(other.latencies)
+        for code, n in enumerate(other.status_counts):
+            if n:
+                self.status_counts[code] += n
+        if self.http_version is None:
+            self.http_version = other.http_version
+
+
+def _run_threaded(url: str, total_requests: int, concurrency: int, method: str, timeout: float, data: Optional[bytes], headers: Optional[dict], stop_requested: threading.Event, record, on_ready, keepalive_requests: int = 0, warmup: bool = True):
+    """Drive the test with a thread pool and blocking `requests` sessions, feeding each result to `record`.
+
+    With `warmup`, every worker first opens its connection with a HEAD request; `on_ready`
+    is called once the timed requests are about to start. With `keepalive_requests`, each
+    worker drops its connection after that many requests.
+    """
+    # Each worker thread owns one requests.Session, so no two threads ever share a
+    # connection pool (and its lock).
+    local = threading.local()
+    sessions = []
+
+    def init_worker():
+        session = requests.Session()
+        # A worker has at most one request in flight, so one pooled keep-alive connection is enough.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, pool_block=True, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(headers or {})
+        local.session = session
+        # Method, URL, body and headers are fixed for the run: prepare the request once.
+        # An initializer that raises breaks the whole pool, so a URL that requests rejects
+        # is kept and reported as a failure by every task instead.
+        try:
+            local.prepared = session.prepare_request(requests.Request(method, url, data=data))
+            local.settings = session.merge_environment_settings(url, {}, None, None, None)
+            del local.settings["stream"]  # make_request always streams
+            local.error = None
+        except RequestException as e:
+            local.error = str(e)
+        local.uses = 0
+        sessions.append(session)
+
+    def task():
+        if local.error is not None:
+            return False, None, 0, local.error, None
+        session = local.session
+        if keepalive_requests:
+            local.uses += 1
+            if local.uses > keepalive_requests:
+                local.uses = 1
+                session.close()  # the next request opens a fresh connection
+        return make_request(session, local.prepared, timeout=timeout, settings=local.settings)
+
+    with ThreadPoolExecutor(max_workers=concurrency, initializer=init_worker) as exe:
+        if warmup:
+            # Pay every worker's TCP/TLS handshake before timing starts. Holding each warmup
+            # task at a barrier forces the pool to start all `concurrency` threads.
+            barrier = threading.Barrier(concurrency, timeout=2 * timeout + 1)
+
+            def warm():
+                try:
+                    local.session.head(url, timeout=timeout, allow_redirects=False)
+                except RequestException:
+                    pass
+                try:
+                    barrier.wait()
+                except threading.BrokenBarrierError:
+                    pass
+
+            wait([exe.submit(warm) for _ in range(concurrency)])
+        on_ready()
+
+        # Keep a bounded window of in-flight futures and top it up as they complete;
+        # a set keeps removal O(1) however many requests the run submits. Twice the
+        # worker count keeps every worker fed while the main thread records results,
+        # without queueing futures the pool cannot start yet.
+        window = concurrency * 2
+        ids = iter(range(total_requests))
+        pending = set()
+        # a stop requested during warmup (Ctrl+C in multi-process mode) sends nothing
+        if not stop_requested.is_set():
+            pending = {exe.submit(task) for _ in islice(ids, window)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    result = False, None, 0, str(e), None
+                record(result)
+
+            # stop submitting once requested and let in-flight requests drain
+            if not stop_requested.is_set():
+                for _ in islice(ids, len(done)):
+                    pending.add(exe.submit(task))
+
+    for session in sessions:
+        session.close()
+
+
+async def _run_async(url: str, total_requests: int, concurrency: int, method: str, timeout: float, data: Optional[bytes], headers: Optional[dict], stop_requested: threading.Event, record, on_ready, http2: bool = False, warmup: bool = True):
+    """Drive the test from a single asyncio event loop with one shared client, feeding each result to `record`.
+
+    The client is an aiohttp session, or an HTTP/2 httpx client when `http2` is set.
+    With `warmup`, `concurrency` HEAD requests open the client's connections first;
+    `on_ready` is called once the timed requests are about to start.
+    """
+    if http2:
+        # Parse the URL once; the clients accept the parsed object as-is on every request.
+        # A URL that fails to parse is kept as a string so every request reports the failure.
+        try:
+            url = httpx.URL(url)
+        except (httpx.InvalidURL, ValueError):
+            pass
+        # HTTP/2 multiplexes concurrent requests as streams over a shared connection, but
+        # plain http:// and servers without h2 fall back to HTTP/1.1 with one request per
+        # connection, so the pool is sized to the concurrency like the aiohttp connector.
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        client = httpx.AsyncClient(http2=True, timeout=timeout, headers=headers, limits=limits)
+        send = make_request_httpx
+
+        async def warm():
+            await client.head(url)
+    else:
+        try:
+            url = yarl.URL(url)
+        except ValueError:
+            pass
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, ttl_dns_cache=300)
+        # Bodies are drained unread, so skip decompressing them.
+        client = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers, auto_decompress=False)
+        send = make_request_async
+
+        async def warm():
+            async with client.head(url, allow_redirects=False):
+                pass
+    sem = asyncio.Semaphore(concurrency)
+
+    async with client:
+        if warmup:
+            # Pay the TCP/TLS handshakes before timing starts; failures just leave a connection cold.
+            await asyncio.gather(*(warm() for _ in range(concurrency)), return_exceptions=True)
+        on_ready()
+
+        async def task():
+            async with sem:
+                return await send(client, method, url, data=data)
+
+        # Keep a bounded window of tasks and top it up as they complete, like the threaded
+        # engine, so pending coroutines don't grow with total_requests and the semaphore
+        # always has a task queued behind every in-flight request.
+        window = concurrency * 2
+        ids = iter(range(total_requests))
+        pending = set()
+        if not stop_requested.is_set():
+            pending = {asyncio.create_task(task()) for _ in islice(ids, window)}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    result = False, None, 0, str(e), None
+                record(result)
+
+            # stop submitting once requested and let in-flight requests drain
+            if not stop_requested.is_set():
+                for _ in islice(ids, len(done)):
+                    pending.add(asyncio.create_task(task()))
 
-def make_request(session: requests.Session, method: str, url: str, timeout: float = 10.0, data: Optional[bytes] = None, headers: Optional[dict] = None):
-    """Send a single HTTP request using the provided Session.
 
-    Returns a tuple: (success: bool, status_code: Optional[int], elapsed_seconds: float, error_message: Optional[str])
+# Tail-latency percentiles reported in the summary, with their metrics-key suffixes.
+LATENCY_PERCENTILES = ((50, "p50"), (95, "p95"), (99, "p99"), (99.9, "p999"))
+
+
+def _percentile(ordered, q: float) -> float:
+    """Percentile `q` of already-sorted samples, linearly interpolated like NumPy's default."""
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def latency_stats(latencies: array) -> dict:
+    """Summarize latency samples (int nanoseconds) into avg/min/max and tail percentiles in seconds, vectorized with NumPy when it is installed."""
+    if not latencies:
+        stats = {"avg_latency_s": 0.0, "min_latency_s": 0.0, "max_latency_s": 0.0}
+        stats.update((f"{key}_latency_s", 0.0) for _, key in LATENCY_PERCENTILES)
+        return stats
+    try:
+        import numpy as np
+    except ImportError:
+        ordered = sorted(latencies)
+        stats = {
+            "avg_latency_s": sum(ordered) / len(ordered) / 1e9,
+            "min_latency_s": ordered[0] / 1e9,
+            "max_latency_s": ordered[-1] / 1e9,
+        }
+        stats.update((f"{key}_latency_s", _percentile(ordered, q) / 1e9) for q, key in LATENCY_PERCENTILES)
+        return stats
+    buf = np.frombuffer(latencies, dtype=np.int64)
+    stats = {
+        "avg_latency_s": float(buf.mean()) / 1e9,
+        "min_latency_s": int(buf.min()) / 1e9,
+        "max_latency_s": int(buf.max()) / 1e9,
+    }
+    tails = np.percentile(buf, [q for q, _ in LATENCY_PERCENTILES])
+    stats.update((f"{key}_latency_s", float(v) / 1e9) for (_, key), v in zip(LATENCY_PERCENTILES, tails))
+    return stats
+
+
+def format_http_version(version) -> Optional[str]:
+    """Render the HTTP version reported by requests (11), aiohttp (HttpVersion(1, 1)) or httpx ("HTTP/2") as text."""
+    if version is None or isinstance(version, str):
+        return version
+    if isinstance(version, int):
+        return f"HTTP/{version // 10}.{version % 10}"
+    return f"HTTP/{version.major}.{version.minor}"
+
+
+def _async_runner(use_uvloop: bool):
+    """Return the function used to run the async engine: `uvloop.run` when requested and available, else `asyncio.run`."""
+    if use_uvloop:
+        try:
+            import uvloop
+            return uvloop.run
+        except ImportError:
+            print("uvloop is not installed; falling back to the default asyncio event loop", file=sys.stderr)
+    return asyncio.run
+
+
+def _run_engine(url: str, total_requests: int, concurrency: int, stop_requested, record, on_ready, method: str = "GET", timeout: float = 10.0, data: Optional[bytes] = None, headers: Optional[dict] = None, use_async: bool = False, use_uvloop: bool = False, keepalive_requests: int = 0, http2: bool = False, warmup: bool = True):
+    """Run the threaded or async engine in the current process, feeding each result to `record`."""
+    if use_async or http2:
+        _async_runner(use_uvloop)(_run_async(url, total_requests, concurrency, method, timeout, data, headers, stop_requested, record, on_ready, http2, warmup))
+    else:
+        _run_threaded(url, total_requests, concurrency, method, timeout, data, headers, stop_requested, record, on_ready, keepalive_requests, warmup)
+
+
+def _run_worker(result_queue, stop_requested, ready, url: str, total_requests: int, concurrency: int, max_samples: int, engine: dict):
+    """Worker-process entry point: run one slice of the test and send the results back over `result_queue`.
+
+    After warming up, the worker waits at the `ready` barrier so that all workers and the
+    parent start the timed run together. Progress is reported as ("progress", n) messages
+    at most every 0.1s, followed by a final ("done", tally).
     """
-    start = time.perf_counter()
+    # Ctrl+C reaches the whole process group; the parent turns it into stop_requested.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    tally = _Tally(total_requests)
+    unreported = 0
+    last_report = time.monotonic()
+
+    def record(result):
+        nonlocal unreported, last_report
+        tally.record(result)
+        unreported += 1
+        now = time.monotonic()
+        if now - last_report >= 0.1:
+            result_queue.put(("progress", unreported))
+            unreported = 0
+            last_report = now
+
+    try:
+        _run_engine(url, total_requests, concurrency, stop_requested, record, lambda: _wait_ready(ready, engine["timeout"]), **engine)
+    finally:
+        tally.compact(max_samples)
+        result_queue.put(("progress", unreported))
+        result_queue.put(("done", tally))
+
+
+def _wait_ready(ready, timeout: float):
+    """Wait at the start barrier; a worker that never arrives only delays the others by the warmup budget."""
     try:
-        resp = session.request(method=method, url=url, timeout=timeout, data=data, headers=headers)
-        elapsed = time.perf_counter() - start
-        return True, resp.status_code, elapsed, None
-    except RequestException as e:
-        elapsed = time.perf_counter() - start
-        return False, None, elapsed, str(e)
+        ready.wait(timeout=2 * timeout + 5)
+    except threading.BrokenBarrierError:
+        pass
 
 
-def run_stress_test(url: str, total_requests: int, concurrency: int, method: str = "GET", timeout: float = 10.0, data: Optional[bytes] = None, headers: Optional[dict] = None, save_report: bool = False):
+def _start_workers(url: str, total_requests: int, concurrency: int, processes: int, engine: dict):
+    """Fork `processes` workers that split the requests and concurrency between them.
+
+    Returns (processes, result_queue, stop_requested, ready) where `ready` is the start
+    barrier shared by the workers and the parent.
+    """
+    ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else None)
+    # spread the remainders over the first workers; callers keep `processes` at most
+    # `concurrency` and `total_requests`, so every worker gets a share of both
+    slices = [
+        (total_requests // processes + (n < total_requests % processes), concurrency // processes + (n < concurrency % processes))
+        for n in range(processes)
+    ]
+    # each worker sends back its share of the latency sample cap
+    max_samples = LATENCY_RING_SIZE // processes
+    result_queue = ctx.Queue()
+    stop_requested = ctx.Event()
+    ready = ctx.Barrier(len(slices) + 1)
+    procs = []
+    for proc_requests, proc_concurrency in slices:
+        proc = ctx.Process(target=_run_worker, args=(result_queue, stop_requested, ready, url, proc_requests, proc_concurrency, max_samples, engine), daemon=True)
+        proc.start()
+        procs.append(proc)
+    return procs, result_queue, stop_requested, ready
+
+
+def _drain_workers(procs: list, result_queue, tally: _Tally, progress):
+    """Collect worker results into `tally`, passing progress counts to `progress`, until every worker is done."""
+    remaining = len(procs)
+    while remaining:
+        try:
+            kind, payload = result_queue.get(timeout=0.5)
+        except Empty:
+            if not any(proc.is_alive() for proc in procs):
+                break  # a worker died without reporting
+            continue
+        if kind == "progress":
+            progress(payload)
+        else:
+            tally.merge(payload)
+            remaining -= 1
+    for proc in procs:
+        proc.join()
+
+
+def run_stress_test(url: str, total_requests: int, concurrency: int, method: str = "GET", timeout: float = 10.0, data: Optional[bytes] = None, headers: Optional[dict] = None, save_report: bool = False, use_async: bool = False, use_uvloop: bool = False, keepalive_requests: int = 0, http2: bool = False, processes: int = 1, warmup: bool = True):
     """Run the stress test and print a summary.
 
+    With `use_async`, requests are issued from an asyncio event loop via aiohttp
+    instead of a thread pool; `use_uvloop` runs that loop on uvloop (libuv).
+    `keepalive_requests` recycles the threaded engine's connections after that
+    many requests (0 keeps them for the whole run). `http2` runs the async engine
+    on an HTTP/2 httpx client instead of aiohttp. With `processes` > 1, the requests
+    and `concurrency` are split across that many worker processes, so the engines
+    are not limited to one core by the GIL. With `warmup`, connections are opened
+    with untimed HEAD requests before the clock starts.
+
     Returns a dict with metrics.
     """
-    metrics_lock = threading.Lock()
-    success_count = 0
-    failure_count = 0
-    latencies = []
-    statuses = Counter()
+    method = method.upper()
+    # every worker process needs at least one request and one concurrent user
+    processes = max(1, min(processes, concurrency, total_requests))
+    engine = dict(method=method, timeout=timeout, data=data, headers=headers, use_async=use_async, use_uvloop=use_uvloop, keepalive_requests=keepalive_requests, http2=http2, warmup=warmup)
+    if processes > 1:
+        # Fork before this process starts any threads (key listener, tqdm monitor).
+        procs, result_queue, stop_requested, ready = _start_workers(url, total_requests, concurrency, processes, engine)
+        tally = _Tally(0)
+    else:
+        stop_requested = threading.Event()
+        tally = _Tally(total_requests)
 
-    # Prepare a requests.Session per worker thread for connection pooling.
-    sessions = [requests.Session() for _ in range(concurrency)]
-    stop_requested = threading.Event()
+    # Written to when the run ends so the key listener wakes up and restores the terminal.
+    wake_r, wake_w = os.pipe() if os.name != 'nt' else (None, None)
 
     # Platform-specific single-key listener to set stop_requested when 's' or 'S' pressed.
+    # It blocks on stdin instead of polling, so it costs no wake-ups while the test runs.
     def key_listener():
         try:
-            import select
+            if not sys.stdin.isatty():
+                return
             if os.name == 'nt':
+                import ctypes
                 import msvcrt
+                kernel32 = ctypes.windll.kernel32
+                handle = kernel32.GetStdHandle(-10)  # STD_INPUT_HANDLE
                 while not stop_requested.is_set():
-                    if msvcrt.kbhit():
-                        ch = msvcrt.getwch()
-                        if ch.lower() == 's':
-                            stop_requested.set()
-                            break
-                    time.sleep(0.1)
+                    # WAIT_OBJECT_0 (0) means console input is pending; time out every 1s to re-check stop_requested
+                    if kernel32.WaitForSingleObject(handle, 1000) != 0:
+                        continue
+                    if not msvcrt.kbhit():
+                        # mouse/focus events also signal the handle; discard them so the wait blocks again
+                        kernel32.FlushConsoleInputBuffer(handle)
+                        continue
+                    ch = msvcrt.getwch()
+                    if ch.lower() == 's':
+                        stop_requested.set()
+                        break
             else:
-                import tty, termios
+                import selectors, termios, tty
                 fd = sys.stdin.fileno()
                 old = termios.tcgetattr(fd)
                 try:
                     tty.setcbreak(fd)
-                    while not stop_requested.is_set():
-                        if select.select([sys.stdin], [], [], 0.1)[0]:
-                            ch = sys.stdin.read(1)
-                            if ch.lower() == 's':
-                                stop_requested.set()
-                                break
+                    with selectors.DefaultSelector() as sel:
+                        sel.register(fd, selectors.EVENT_READ)
+                        sel.register(wake_r, selectors.EVENT_READ)
+                        while not stop_requested.is_set():
+                            for key, _ in sel.select():
+                                if key.fd == wake_r:
+                                    return
+                                ch = sys.stdin.read(1)
+                                if ch.lower() == 's':
+                                    stop_requested.set()
+                                    return
                 finally:
                     termios.tcsetattr(fd, termios.TCSADRAIN, old)
         except Exception:
@@ -103,64 +590,78 @@ def run_stress_test(url: str, total_requests: int, concurrency: int, method: str
     listener_thread = threading.Thread(target=key_listener, daemon=True)
     listener_thread.start()
 
-    def task(i: int):
-        # Round-robin pick a session to reduce contention
-        session = sessions[i % len(sessions)]
-        return make_request(session, method, url, timeout=timeout, data=data, headers=headers)
-
-    futures = []
     pbar = tqdm(total=total_requests if total_requests < 10**9 else None, desc="Requests", unit="req")
 
+    def progress(n: int):
+        if pbar.total is not None:
+            pbar.update(n)
+
+    # tqdm.update() takes a lock and may redraw, so feed it in batches: every 0.1% of the
+    # run or every 0.1s (tqdm's own redraw interval), whichever comes first.
+    pbar_step = max(1, (pbar.total or 0) // 1000)
+    unshown = 0
+    last_shown = time.monotonic()
+
+    def record(result):
+        nonlocal unshown, last_shown
+        tally.record(result)
+        unshown += 1
+        now = time.monotonic()
+        if unshown >= pbar_step or now - last_shown >= 0.1:
+            progress(unshown)
+            unshown = 0
+            last_shown = now
+
+    # The clock starts once warmup is done; the early value only covers runs that fail before that.
     test_start = time.perf_counter()
+
+    def on_ready():
+        nonlocal test_start
+        test_start = time.perf_counter()
+
     try:
-        with ThreadPoolExecutor(max_workers=concurrency) as exe:
-            submitted = 0
-            # submit tasks in batches and stop if requested
-            batch_size = max(1, concurrency * 5)
-            while submitted < total_requests and not stop_requested.is_set():
-                to_submit = min(batch_size, total_requests - submitted)
-                for i in range(submitted, submitted + to_submit):
-                    futures.append(exe.submit(task, i))
-                submitted += to_submit
-
-                # Process completed futures as they finish to avoid memory growth
-                for fut in as_completed(list(futures)):
-                    try:
-                        success, status_code, elapsed, error = fut.result()
-                    except Exception as e:
-                        success, status_code, elapsed, error = False, None, 0.0, str(e)
-                    with metrics_lock:
-                        if success:
-                            success_count += 1
-                            latencies.append(elapsed)
-                            if status_code is not None:
-                                statuses[status_code] += 1
-                        else:
-                            failure_count += 1
-                    if pbar.total is not None:
-                        pbar.update(1)
-                    # remove processed futures from list
-                    try:
-                        futures.remove(fut)
-                    except ValueError:
-                        pass
-
-                # small sleep to yield
-                if stop_requested.is_set():
-                    break
-                time.sleep(0.01)
+        if processes > 1:
+            try:
+                _wait_ready(ready, timeout)
+                on_ready()
+                _drain_workers(procs, result_queue, tally, progress)
+            except KeyboardInterrupt:
+                # workers ignore SIGINT: ask them to stop and keep collecting their partial results
+                # set the stop before breaking the barrier so no released worker misses it
+                stop_requested.set()
+                ready.abort()
+                print("\nInterrupted by user; waiting for workers to finish in-flight requests...", file=sys.stderr)
+                _drain_workers(procs, result_queue, tally, progress)
+        else:
+            _run_engine(url, total_requests, concurrency, stop_requested, record, on_ready, **engine)
     except KeyboardInterrupt:
         stop_requested.set()
         pbar.close()
         print("\nInterrupted by user; summarizing partial results...", file=sys.stderr)
     finally:
+        progress(unshown)
         pbar.close()
+        # wake the key listener so it restores the terminal before the summary prints
+        stop_requested.set()
+        if wake_w is not None:
+            os.write(wake_w, b"\0")
+        listener_thread.join(timeout=1.5)
+        if wake_w is not None:
+            os.close(wake_r)
+            os.close(wake_w)
 
     test_duration = time.perf_counter() - test_start
+    tally.compact()
+    success_count = tally.success
+    failure_count = tally.failure
     total_done = success_count + failure_count
-    avg_latency = (sum(latencies) / len(latencies)) if latencies else 0.0
-    min_latency = min(latencies) if latencies else 0.0
-    max_latency = max(latencies) if latencies else 0.0
+    statuses = {code: n for code, n in enumerate(tally.status_counts) if n}
+    protocol = format_http_version(tally.http_version)
+    latency_samples = len(tally.latencies)
+    stats = latency_stats(tally.latencies)
+    avg_latency = stats["avg_latency_s"]
+    min_latency = stats["min_latency_s"]
+    max_latency = stats["max_latency_s"]
     rps = total_done / test_duration if test_duration > 0 else 0.0
     # Average Concurrent Users = RPS * Average Latency (Little's Law)
     avg_concurrent_users = rps * avg_latency
@@ -172,10 +673,13 @@ def run_stress_test(url: str, total_requests: int, concurrency: int, method: str
         "success": success_count,
         "failure": failure_count,
         "success_rate": success_rate,
-        "statuses": dict(statuses),
+        "statuses": statuses,
+        "protocol": protocol,
+        "latency_samples": latency_samples,
         "avg_latency_s": avg_latency,
         "min_latency_s": min_latency,
         "max_latency_s": max_latency,
+        **{f"{key}_latency_s": stats[f"{key}_latency_s"] for _, key in LATENCY_PERCENTILES},
         "duration_s": test_duration,
         "rps": rps,
         "avg_concurrent_users": avg_concurrent_users,
@@ -184,17 +688,22 @@ def run_stress_test(url: str, total_requests: int, concurrency: int, method: str
     summary = [
         "\nStress test summary:",
         f"  Target URL:  {url}",
-        f"  Configured Concurrency: {concurrency} (Simulated Users)",
+        f"  Protocol:    {protocol or 'unknown'}",
+        f"  Configured Concurrency: {concurrency} (Simulated Users)" + (f" across {processes} processes" if processes > 1 else ""),
         f"  Requested:   {total_requests}",
         f"  Completed:   {total_done}",
         f"  Success:     {success_count} ({success_rate:.1f}%)",
         f"  Failure:     {failure_count}",
-        f"  Status codes: {dict(statuses)}",
+        f"  Status codes: {statuses}",
         f"  Duration:    {test_duration:.2f}s",
         f"  Requests/s:  {rps:.2f}",
         f"  Latency (s): avg={avg_latency:.4f} min={min_latency:.4f} max={max_latency:.4f}",
+        "  Percentiles (s): " + " ".join(f"p{q:g}={stats[f'{key}_latency_s']:.4f}" for q, key in LATENCY_PERCENTILES),
         f"  Estimated Avg. Concurrent Users: {avg_concurrent_users:.2f}"
     ]
+    if latency_samples < success_count:
+        # the latency ring wrapped, so the stats only cover the most recent samples
+        summary.insert(-1, f"  (latency stats over the most recent {latency_samples} of {success_count} successful requests)")
 
     summary_text = "\n".join(summary)
     print(summary_text)
@@ -217,9 +726,15 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--concurrency", "-c", type=int, default=int(os.environ.get("STRESS_CONCURRENCY", DEFAULT_CONCURRENCY)), help="Number of concurrent worker threads")
     p.add_argument("--timeout", "-t", type=float, default=10.0, help="Per-request timeout in seconds")
     p.add_argument("--method", "-m", default="GET", help="HTTP method to use")
-    p.add_argument("--paranoid", action="store_true", help="Run in paranoid mode: push the system using max CPU concurrency until interrupted or --max-requests is reached")
+    p.add_argument("--processes", "-p", type=int, default=1, help="Number of worker processes to split the requests and concurrency across")
+    p.add_argument("--paranoid", action="store_true", help="Run in paranoid mode: one worker process per CPU core, each with --concurrency workers, until interrupted or --max-requests is reached")
     p.add_argument("--max-requests", type=int, default=0, help="Optional cap for paranoid mode; 0 means unlimited until interrupted")
     p.add_argument("--report", action="store_true", help="Save the test summary to a timestamped .log file")
+    p.add_argument("--async", dest="use_async", action="store_true", help="Issue requests from an asyncio event loop via aiohttp instead of worker threads")
+    p.add_argument("--uvloop", dest="use_uvloop", action="store_true", help="With --async, run the event loop on uvloop (libuv) for lower per-request syscall overhead")
+    p.add_argument("--http2", action="store_true", help="Multiplex requests over a few HTTP/2 connections with httpx (async engine; requires httpx[http2])")
+    p.add_argument("--no-warmup", dest="warmup", action="store_false", help="Skip the untimed HEAD request per connection that pays TCP/TLS handshakes before timing starts")
+    p.add_argument("--keepalive-requests", type=int, default=0, help="Recycle each worker's connections after this many requests (e.g. 1000, nginx's default keepalive_requests); 0 keeps them open for the whole run")
     return p.parse_args()
 
 
@@ -231,12 +746,31 @@ def main():
     if args.concurrency <= 0:
         print("--concurrency must be > 0", file=sys.stderr)
         sys.exit(2)
+    if args.processes <= 0:
+        print("--processes must be > 0", file=sys.stderr)
+        sys.exit(2)
+    if args.use_async and not args.http2 and aiohttp is None:
+        print("--async requires aiohttp (pip install aiohttp)", file=sys.stderr)
+        sys.exit(2)
+    if args.http2 and (httpx is None or importlib.util.find_spec("h2") is None):
+        print("--http2 requires httpx with HTTP/2 support (pip install 'httpx[http2]')", file=sys.stderr)
+        sys.exit(2)
+    if args.use_uvloop and not (args.use_async or args.http2):
+        print("--uvloop requires --async or --http2", file=sys.stderr)
+        sys.exit(2)
+    if args.keepalive_requests < 0:
+        print("--keepalive-requests must be >= 0", file=sys.stderr)
+        sys.exit(2)
+    if args.keepalive_requests and (args.use_async or args.http2):
+        print("--keepalive-requests is not supported with --async or --http2", file=sys.stderr)
+        sys.exit(2)
 
     if args.paranoid:
-        cpu_count = os.cpu_count() or 1
-        concurrency = cpu_count
+        # one worker process per core sidesteps the GIL; each runs --concurrency workers
+        processes = os.cpu_count() or 1
+        concurrency = processes * args.concurrency
         total_requests = args.max_requests if args.max_requests > 0 else 10 ** 12
-        print(f"Running in PARANOID mode: concurrency={concurrency}, max_requests={'unlimited' if args.max_requests==0 else total_requests}")
+        print(f"Running in PARANOID mode: processes={processes}, concurrency={concurrency}, max_requests={'unlimited' if args.max_requests==0 else total_requests}")
         try:
             run_stress_test(
                 url=args.url, 
@@ -244,7 +778,13 @@ def main():
                 concurrency=concurrency, 
                 method=args.method, 
                 timeout=args.timeout,
-                save_report=args.report
+                save_report=args.report,
+                use_async=args.use_async,
+                use_uvloop=args.use_uvloop,
+                keepalive_requests=args.keepalive_requests,
+                http2=args.http2,
+                processes=processes,
+                warmup=args.warmup
             )
         except KeyboardInterrupt:
             print("\nParanoid run interrupted by user.")
@@ -255,7 +795,13 @@ def main():
             concurrency=args.concurrency, 
             method=args.method, 
             timeout=args.timeout,
-            save_report=args.report
+            save_report=args.report,
+            use_async=args.use_async,
+            use_uvloop=args.use_uvloop,
+            keepalive_requests=args.keepalive_requests,
+            http2=args.http2,
+            processes=args.processes,
+            warmup=args.warmup
         )
 
 